@@ -2,48 +2,176 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import json
+import html
+import os
+import bisect
+import tempfile
+import threading
+from collections import OrderedDict
 
 # --- Configuration & Utility Functions ---
 
+EVENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'events.json')
+
+@st.cache_resource
+def _get_events_file_lock():
+    """Returns the process-wide lock that serializes read-modify-write of EVENTS_FILE across sessions."""
+    # Streamlit re-executes this script on every rerun, so a module-level Lock would be new each run
+    return threading.Lock()
+
+def _events_file_signature():
+    """Returns an (inode, mtime) pair identifying the current events file, or None if there isn't one."""
+    try:
+        stat = os.stat(EVENTS_FILE)
+    except FileNotFoundError:
+        return None
+    # Each write replaces the file, so the inode changes even if the mtime resolution is coarse
+    return (stat.st_ino, stat.st_mtime_ns)
+
+@st.cache_data(max_entries=1) # Only the current file version is useful; older ones are never read again
+def _load_events_from_disk(signature):
+    """Reads the saved events file as (events, next_id). Keyed by the file's signature, so it is only re-read after a write."""
+    with open(EVENTS_FILE, encoding='utf-8') as f:
+        data = json.load(f)
+    # Files written before the id counter was persisted are a bare list of events
+    events, next_id = (data, 0) if isinstance(data, list) else (data['events'], data['next_id'])
+    # Only user fields are stored; derived fields are rebuilt so format changes never leave stale data
+    for event in events:
+        refresh_derived_fields(event)
+    events.sort(key=lambda e: e['_sort_key'])
+    return events, next_id
+
+def _use_events(events, next_id, signature):
+    """Makes the given events this session's working list and rebuilds the id lookups."""
+    st.session_state.events = events
+    st.session_state.events_by_id = {e['id']: e for e in events}
+    st.session_state.events_index = {e['id']: i for i, e in enumerate(events)}
+    # The stored counter keeps ids of deleted events from being handed out again
+    st.session_state.next_event_id = max(next_id, max(st.session_state.events_by_id, default=-1) + 1)
+    st.session_state.events_signature = signature
+
+@st.cache_resource
+def _get_umask():
+    """Returns the process umask. Read once, since reading it means briefly setting it."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+def _events_file_mode():
+    """Returns the permission bits for the events file: its current mode, or the umask default for a new file."""
+    try:
+        return os.stat(EVENTS_FILE).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_get_umask()
+
+def save_events_to_disk(event_list):
+    """Writes events to the events file, replacing it atomically. Call with the events file lock held."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(EVENTS_FILE), prefix='events.json.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            fd = None # Now owned (and closed) by f
+            # Derived (underscore-prefixed) fields are recomputed on load, so they aren't persisted
+            json.dump({
+                'next_id': st.session_state.next_event_id,
+                'events': [{k: v for k, v in e.items() if not k.startswith('_')} for e in event_list],
+            }, f)
+        # mkstemp creates the file owner-only; keep the mode the events file had (or would get by default)
+        os.chmod(tmp_path, _events_file_mode())
+        os.replace(tmp_path, EVENTS_FILE)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        os.remove(tmp_path)
+        raise
+    st.session_state.events_signature = _events_file_signature()
+
 def load_events():
-    """Loads events from Streamlit's session state (or initializes an empty list)."""
+    """Loads events into Streamlit's session state from the events file (or initializes an empty list)."""
     if 'events' not in st.session_state:
-        # For a truly persistent app (like in your JS example), you'd use a file (JSON/CSV) or DB.
-        # Here we use session state for simplicity, as Streamlit is stateless on a per-session basis.
-        st.session_state.events = []
+        signature = _events_file_signature()
+        _use_events(*(_load_events_from_disk(signature) if signature else ([], 0)), signature)
     return st.session_state.events
 
-def save_events(event_list):
-    """Saves events to Streamlit's session state."""
-    st.session_state.events = event_list
+def sync_events_from_disk():
+    """Returns the session's events, first reloading them if another session has written the events file.
+
+    Call with the events file lock held, before mutating, so changes (and new ids) build on the on-disk state.
+    """
+    events = load_events()
+    signature = _events_file_signature()
+    if signature != st.session_state.events_signature:
+        _use_events(*(_load_events_from_disk(signature) if signature else ([], 0)), signature)
+        st.session_state.events_version += 1
+        events = st.session_state.events
+    return events
+
+def refresh_derived_fields(event):
+    """Recomputes the cached search, sort and display fields from an event's data."""
+    # Precompute the lowercased search text once so filtering doesn't lowercase every field on each rerun
+    event['_search_blob'] = (event['title'] + '\x00' + event['description'] + '\x00' + event['location']).lower()
+    # Fixed-width ISO date/time string, so it sorts lexically in chronological order without strptime
+    event['_sort_key'] = f"{event['date']}T{event['time']}"
+    # Display strings for the event card, so rendering doesn't re-parse the date and time
+    event['_date_display'] = datetime.strptime(event['date'], '%Y-%m-%d').strftime('%a, %b %d, %Y')
+    event['_time_display'] = datetime.strptime(event['time'], '%H:%M').strftime('%I:%M %p')
+    # Escaped card fragments (events come from a shared file, so user text must not be treated as HTML);
+    # the optional ones are empty when blank, so the card template is a flat join
+    event['_title_html'] = html.escape(event['title'])
+    event['_category_html'] = html.escape(event['category'])
+    event['_location_html'] = CARD_LOCATION_OPEN + html.escape(event['location']) + DIV_CLOSE if event['location'] else ''
+    event['_description_html'] = CARD_DESCRIPTION_OPEN + html.escape(event['description']) + DIV_CLOSE if event['description'] else ''
 
 def add_event(event_data):
     """Adds a new event or updates an existing one."""
-    events = load_events()
+    with _get_events_file_lock():
+        events = sync_events_from_disk()
     
-    if st.session_state.editing_id is not None:
-        # Edit existing event
-        index = next((i for i, event in enumerate(events) if event['id'] == st.session_state.editing_id), -1)
-        if index != -1:
-            events[index] = {**event_data, 'id': st.session_state.editing_id}
-        st.session_state.editing_id = None
-        st.toast("✅ Event updated successfully!")
-    else:
-        # Add new event
-        event_data['id'] = datetime.now().timestamp() # Use timestamp for unique ID
-        events.append(event_data)
-        st.toast("✅ New Event created!")
+        if st.session_state.editing_id is not None:
+            # Edit existing event
+            index = st.session_state.events_index.get(st.session_state.editing_id)
+            st.session_state.editing_id = None
+            if index is None:
+                # Another session deleted it since the form was opened; nothing to save
+                st.toast("⚠️ This event no longer exists.")
+            else:
+                # Update in place (keeping its id), then re-insert so the list stays ordered if the date/time changed
+                event = events.pop(index)
+                event.update(event_data)
+                refresh_derived_fields(event)
+                position = insert_event_sorted(events, event)
+                reindex_events(events, min(index, position))
+                save_events_to_disk(events)
+                st.session_state.events_version += 1
+                st.toast("✅ Event updated successfully!")
+        else:
+            # Add new event
+            refresh_derived_fields(event_data)
+            event_data['id'] = st.session_state.next_event_id # Monotonic integer ID, allocated against the on-disk events
+            st.session_state.next_event_id += 1
+            position = insert_event_sorted(events, event_data)
+            reindex_events(events, position)
+            st.session_state.events_by_id[event_data['id']] = event_data
+            save_events_to_disk(events)
+            st.session_state.events_version += 1
+            st.toast("✅ New Event created!")
     
-    save_events(events)
     # Automatically switch to view tab after create/edit
     st.session_state.current_tab = 'View Events'
 
 
 def delete_event(event_id):
     """Deletes an event by its ID."""
-    events = [event for event in load_events() if event['id'] != event_id]
-    save_events(events)
-    st.toast("🗑️ Event deleted.")
+    with _get_events_file_lock():
+        events = sync_events_from_disk()
+        index = st.session_state.events_index.pop(event_id, None)
+        if index is not None:
+            events.pop(index)
+            reindex_events(events, index)
+            del st.session_state.events_by_id[event_id]
+            save_events_to_disk(events)
+            st.session_state.events_version += 1
+    # Already gone if another session deleted it first; only report what this call did
+    st.toast("🗑️ Event deleted." if index is not None else "⚠️ This event was already deleted.")
     st.rerun() # Rerun to refresh the list
 
 def start_edit_event(event_id):
@@ -51,33 +179,104 @@ def start_edit_event(event_id):
     st.session_state.editing_id = event_id
     st.session_state.current_tab = 'Create Event'
 
+def set_events_page(page):
+    """Moves the View Events list to the given page."""
+    st.session_state.events_page = page
+
 def get_event_by_id(event_id):
     """Retrieves a single event object."""
-    return next((e for e in load_events() if e['id'] == event_id), None)
+    return st.session_state.events_by_id.get(event_id)
+
+def insert_event_sorted(events, event):
+    """Inserts an event into the list, which is kept ordered by date and time. Returns its position."""
+    position = bisect.bisect_right(events, event['_sort_key'], key=lambda e: e['_sort_key'])
+    events.insert(position, event)
+    return position
+
+def reindex_events(events, start):
+    """Refreshes the id-to-index map for events[start:] after an insert or removal shifted them."""
+    events_index = st.session_state.events_index
+    for i in range(start, len(events)):
+        events_index[events[i]['id']] = i
+
+def _filter_event_ids(search_query, category_filter, events_version):
+    """Returns the ids of matching events, in date and time order.
+
+    events_version is unused in the body; it is part of the cache key so results are dropped
+    whenever the events change.
+    """
+    all_categories = category_filter == "All Categories"
+    # Every whitespace-separated term must appear somewhere in the event's search blob
+    terms = search_query.split()
+    # The event list is kept sorted on insert, so filtering preserves chronological order
+    return tuple(
+        e['id'] for e in load_events()
+        if (all_categories or e['category'] == category_filter)
+        and (not terms or all(term in e['_search_blob'] for term in terms))
+    )
+
+def get_filtered_event_ids(search_query, category_filter):
+    """Returns the filtered event ids, cached per session by (query, category, events version)."""
+    # One cache per session: the version counter alone doesn't identify another session's events.
+    # Results (not a wrapped function) are cached, so each rerun calls this run's _filter_event_ids.
+    if 'filter_cache' not in st.session_state:
+        st.session_state.filter_cache = OrderedDict()
+    filter_cache = st.session_state.filter_cache
+    key = (search_query, category_filter, st.session_state.events_version)
+    if key in filter_cache:
+        filter_cache.move_to_end(key)
+        return filter_cache[key]
+    filter_cache[key] = result = _filter_event_ids(*key)
+    if len(filter_cache) > FILTER_CACHE_SIZE:
+        filter_cache.popitem(last=False) # Evict the least recently used result
+    return result
+
+FILTER_CACHE_SIZE = 128 # Filter results kept per session
+EVENTS_PAGE_SIZE = 30 # Event cards rendered per page in the View Events tab
 
-def sort_events(event_list):
-    """Sorts events by date and time."""
-    return sorted(event_list, key=lambda x: datetime.strptime(f"{x['date']} {x['time']}", "%Y-%m-%d %H:%M"))
+# --- Event Card HTML Fragments ---
+# Constant pieces of the event card markup, joined with the event fields at render time
+
+DIV_CLOSE = "</div>"
+CARD_OPEN = (
+    '<div style="background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%); border-radius: 12px; '
+    'padding: 20px; margin-bottom: 20px; border-left: 4px solid #667eea; box-shadow: 0 4px 12px rgba(0,0,0,0.05);">'
+    '<div style="font-size: 1.3rem; font-weight: 700; color: #212529; margin-bottom: 10px;">'
+)
+CARD_DATE_OPEN = '</div><div style="color: #6c757d; margin-bottom: 8px;">📅 '
+CARD_TIME_OPEN = '</div><div style="color: #6c757d; margin-bottom: 8px;">🕐 '
+CARD_LOCATION_OPEN = "<div style='color: #6c757d; margin-bottom: 8px;'>📍 "
+CARD_BADGE_OPEN = (
+    '<div style="margin: 10px 0;"><span style=\'background-color: #667eea; color: white; padding: 4px 12px; '
+    'border-radius: 20px; font-size: 0.85rem; font-weight: 600;\'>'
+)
+CARD_BADGE_CLOSE = "</span></div>"
+CARD_DESCRIPTION_OPEN = "<div style='color: #495057; margin: 15px 0; line-height: 1.6;'>"
 
 # --- Streamlit UI Components ---
 
+EVENT_CATEGORIES = ["Meeting", "Conference", "Workshop", "Social", "Other"]
+
+# Form values for a new event (date and time are added at render time)
+_EVENT_DEFAULTS = {'title': '', 'location': '', 'category': EVENT_CATEGORIES[0], 'description': ''}
+
 def create_event_tab():
     """Renders the Create/Edit Event form."""
     
-    event_categories = ["Meeting", "Conference", "Workshop", "Social", "Other"]
-    
     # Check if we are editing an existing event
-    editing_event = get_event_by_id(st.session_state.editing_id) if 'editing_id' in st.session_state and st.session_state.editing_id else None
+    editing_event = get_event_by_id(st.session_state.editing_id) if st.session_state.get('editing_id') is not None else None
     
     st.subheader(f"{'Edit' if editing_event else 'Create New'} Event")
     
     # Pre-fill form fields if editing
-    default_title = editing_event.get('title', '') if editing_event else ''
-    default_date = editing_event.get('date', datetime.today().strftime('%Y-%m-%d')) if editing_event else datetime.today().strftime('%Y-%m-%d')
-    default_time = editing_event.get('time', datetime.now().strftime('%H:%M')) if editing_event else datetime.now().strftime('%H:%M')
-    default_location = editing_event.get('location', '') if editing_event else ''
-    default_category = editing_event.get('category', event_categories[0]) if editing_event else event_categories[0]
-    default_description = editing_event.get('description', '') if editing_event else ''
+    # Date and time defaults are filled in per render, since they depend on the current time
+    src = editing_event or {**_EVENT_DEFAULTS, 'date': datetime.today().strftime('%Y-%m-%d'), 'time': datetime.now().strftime('%H:%M')}
+    default_title = src['title']
+    default_date = src['date']
+    default_time = src['time']
+    default_location = src['location']
+    default_category = src['category']
+    default_description = src['description']
 
     with st.form(key='eventForm'):
         event_title = st.text_input("Event Title *", default_title, key='eventTitle')
@@ -89,7 +288,7 @@ def create_event_tab():
             event_time = st.time_input("Time *", datetime.strptime(default_time, '%H:%M').time(), key='eventTime')
         
         event_location = st.text_input("Location", default_location, key='eventLocation', placeholder="Event location")
-        event_category = st.selectbox("Category", event_categories, index=event_categories.index(default_category), key='eventCategory')
+        event_category = st.selectbox("Category", EVENT_CATEGORIES, index=EVENT_CATEGORIES.index(default_category), key='eventCategory')
         event_description = st.text_area("Description", default_description, key='eventDescription', placeholder="Event details and notes")
         
         submit_button = st.form_submit_button(label=f"{'Update Event' if editing_event else 'Create Event'}", use_container_width=True)
@@ -111,33 +310,32 @@ def create_event_tab():
 
 def view_events_tab():
     """Renders the View Events list with search and filters."""
+    # Skip all filter and render work unless this is the active tab
+    if st.session_state.current_tab != 'View Events':
+        return
     st.subheader("Your Events")
     
     all_events = load_events()
-    event_categories = ["All Categories"] + ["Meeting", "Conference", "Workshop", "Social", "Other"]
+    event_categories = ["All Categories"] + EVENT_CATEGORIES
 
     # --- Filter Bar ---
     col1, col2 = st.columns(2)
     with col1:
-        search_query = st.text_input("🔍 Search events...", key='searchInput', placeholder="Title, location, or description")
+        search_query = st.text_input("🔍 Search events...", key='searchInput', placeholder="Title, location, or description", on_change=set_events_page, args=(0,))
     with col2:
-        category_filter = st.selectbox("Filter by Category", event_categories, key='categoryFilter')
+        category_filter = st.selectbox("Filter by Category", event_categories, key='categoryFilter', on_change=set_events_page, args=(0,))
 
     # --- Filtering Logic ---
-    filtered_events = []
-    
-    if all_events:
-        for event in all_events:
-            matches_search = search_query.lower() in event['title'].lower() or \
-                             search_query.lower() in event['description'].lower() or \
-                             search_query.lower() in event['location'].lower()
-            
-            matches_category = category_filter == "All Categories" or event['category'] == category_filter
-
-            if matches_search and matches_category:
-                filtered_events.append(event)
+    # The filter pipeline is cached; it only reruns when the query, category or events change
+    query = search_query.lower()
+    sorted_ids = get_filtered_event_ids(query, category_filter)
 
-    sorted_events = sort_events(filtered_events)
+    # --- Pagination ---
+    # Only the current page of events is rendered, so the per-rerun cost doesn't grow with the event count
+    page_count = max(1, -(-len(sorted_ids) // EVENTS_PAGE_SIZE))
+    page = min(st.session_state.get('events_page', 0), page_count - 1)
+    events_by_id = st.session_state.events_by_id
+    page_events = [events_by_id[event_id] for event_id in sorted_ids[page * EVENTS_PAGE_SIZE:(page + 1) * EVENTS_PAGE_SIZE]]
 
     # --- Display Events ---
     
@@ -152,7 +350,7 @@ def view_events_tab():
             """, 
             unsafe_allow_html=True
         )
-    elif not sorted_events:
+    elif not page_events:
         st.markdown(
             """
             <div style='text-align: center; padding: 60px 20px; color: #6c757d;'>
@@ -167,40 +365,19 @@ def view_events_tab():
         # Use columns to mimic the grid layout
         cols = st.columns(3) # Adjust number of columns as needed
         
-        for i, event in enumerate(sorted_events):
+        for i, event in enumerate(page_events):
             with cols[i % 3]: # Cycle through columns
-                # Custom HTML/Markdown for the event card styling
-                badge_style = "background-color: #667eea; color: white; padding: 4px 12px; border-radius: 20px; font-size: 0.85rem; font-weight: 600;"
-                
+                # Custom HTML/Markdown for the event card styling, assembled from prebuilt fragments
                 st.markdown(
-                    f"""
-                    <div style="
-                        background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%); 
-                        border-radius: 12px; 
-                        padding: 20px; 
-                        margin-bottom: 20px;
-                        border-left: 4px solid #667eea;
-                        box-shadow: 0 4px 12px rgba(0,0,0,0.05);
-                    ">
-                        <div style="font-size: 1.3rem; font-weight: 700; color: #212529; margin-bottom: 10px;">
-                            {event['title']}
-                        </div>
-                        <div style="color: #6c757d; margin-bottom: 8px;">
-                            📅 {datetime.strptime(event['date'], '%Y-%m-%d').strftime('%a, %b %d, %Y')}
-                        </div>
-                        <div style="color: #6c757d; margin-bottom: 8px;">
-                            🕐 {datetime.strptime(event['time'], '%H:%M').strftime('%I:%M %p')}
-                        </div>
-                        {f"<div style='color: #6c757d; margin-bottom: 8px;'>📍 {event['location']}</div>" if event['location'] else ''}
-                        
-                        <div style="margin: 10px 0;">
-                            <span style='{badge_style}'>{event['category']}</span>
-                        </div>
-                        
-                        {f"<div style='color: #495057; margin: 15px 0; line-height: 1.6;'>{event['description']}</div>" if event['description'] else ''}
-                        
-                        <div style='display: flex; gap: 10px; margin-top: 15px;'>
-                    """, 
+                    ''.join([
+                        CARD_OPEN, event['_title_html'],
+                        CARD_DATE_OPEN, event['_date_display'],
+                        CARD_TIME_OPEN, event['_time_display'], DIV_CLOSE,
+                        event['_location_html'],
+                        CARD_BADGE_OPEN, event['_category_html'], CARD_BADGE_CLOSE,
+                        event['_description_html'],
+                        DIV_CLOSE,
+                    ]),
                     unsafe_allow_html=True
                 )
                 
@@ -210,24 +387,20 @@ def view_events_tab():
                     st.button("Edit", key=f"edit_{event['id']}", on_click=start_edit_event, args=(event['id'],), use_container_width=True)
                 with col_delete:
                     st.button("Delete", key=f"delete_{event['id']}", on_click=delete_event, args=(event['id'],), use_container_width=True)
-                
-                # Close the div structure started in the markdown block
-                st.markdown("</div></div>", unsafe_allow_html=True)
 
+        if page_count > 1:
+            col_prev, col_page, col_next = st.columns([1, 2, 1])
+            with col_prev:
+                st.button("← Previous", key='eventsPrevPage', on_click=set_events_page, args=(page - 1,), disabled=page == 0, use_container_width=True)
+            with col_page:
+                st.markdown(f"<div style='text-align: center; color: #6c757d;'>Page {page + 1} of {page_count}</div>", unsafe_allow_html=True)
+            with col_next:
+                st.button("Next →", key='eventsNextPage', on_click=set_events_page, args=(page + 1,), disabled=page == page_count - 1, use_container_width=True)
 
-# --- Main App Execution ---
 
-def main():
-    """Main function to run the Streamlit application."""
-    st.set_page_config(layout="wide", page_title="Event Manager App")
-    
-    # Initialize session state for active tab and editing
-    if 'current_tab' not in st.session_state:
-        st.session_state.current_tab = 'Create Event'
-    if 'editing_id' not in st.session_state:
-        st.session_state.editing_id = None
-        
-    st.markdown("""
+# --- Page Styling ---
+
+_CSS = """
         <style>
             /* Custom CSS to match the original gradient background */
             .main {
@@ -272,6 +445,26 @@ def main():
                 padding: 30px; 
             }
         </style>
+"""
+
+
+# --- Main App Execution ---
+
+def main():
+    """Main function to run the Streamlit application."""
+    st.set_page_config(layout="wide", page_title="Event Manager App")
+    
+    # Initialize session state for active tab and editing
+    if 'current_tab' not in st.session_state:
+        st.session_state.current_tab = 'Create Event'
+    if 'editing_id' not in st.session_state:
+        st.session_state.editing_id = None
+    if 'events_version' not in st.session_state:
+        st.session_state.events_version = 0
+    load_events() # Also sets up the id lookups and the next event id
+        
+    st.markdown(_CSS, unsafe_allow_html=True)
+    st.markdown("""
         <div style="text-align: center; color: white; margin-bottom: 30px;">
             <h1 style="font-size: 2.5rem; margin-bottom: 10px; text-shadow: 2px 2px 4px rgba(0,0,0,0.2);">📅 Event Manager</h1>
             <p style="font-size: 1.1rem; opacity: 0.9;">Organize and track your events effortlessly</p>